@@ -26,87 +26,219 @@ Options:
                                 [default: 10]
     --log-time-threshold=<sec>  minimum time of commands to be logged
                                 [default: 1]
+    --concurrency=<n>           maximum number of commands running at once
+                                (default: number of CPUs, but at most 8)
+    --cache-dir=<path>          reuse output of static recordables stored in
+                                this directory by an earlier run of the same
+                                user on the same node since its last boot
     --errors-fatal              make any errors abort metadata gathering
     --no-result-json            do not add logging output in JSON format
     -v, --verbose               increase output
     -h, --help                  print this text
 """
-import json
+import asyncio
+import functools
 import logging
 import logging.config
 import os
+import resource
 import shlex
+import shutil
+import socket
+import sys
+import tempfile
 import time
-from dataclasses import asdict, dataclass, field
+from asyncio.subprocess import Process
+from collections import ChainMap
+from dataclasses import dataclass, field
 from pathlib import Path
 from pprint import pformat
-from subprocess import DEVNULL, PIPE, CalledProcessError, Popen, TimeoutExpired
-from typing import Any, Dict, Optional, Sequence
+from subprocess import DEVNULL, CalledProcessError
+from typing import Callable, Collection, Dict, List, Optional, Sequence, Union
 
-from docopt import docopt  # type: ignore
+import orjson
+from docopt import DocoptExit, docopt  # type: ignore
 
 from . import __version__
 
-log = logging.getLogger()
-logging.basicConfig(level=logging.DEBUG)
-
-log = logging.getLogger()
-
-try:
-    import yaml
-
-    basepath = Path(__file__).parent
-    with (basepath / "../logging.yaml").open("r", encoding="utf8") as logconfig:
-        logging.config.dictConfig(yaml.safe_load(logconfig))
-except ImportError as exc:
-    logging.basicConfig(level=logging.DEBUG)
-    log.warning("using basic logging config due to exception %s", exc)
-except FileNotFoundError as exc:
-    logging.basicConfig(level=logging.DEBUG)
-    log.warning("using basic logging config due to exception %s", exc)
-
-_recordables = {
-    "date": "date --iso=seconds",
-    "sysctl-a": "sysctl -a",
-    "lshw": "lshw -json -quiet",
-    "dmidecode": "dmidecode",
-    "lspci": "lspci -v",
-    "false": "/bin/false",
-    "broken": "nothing",
-    "cpuinfo": "cat /proc/cpuinfo",
-    "meminfo": "cat /proc/meminfo",
-    "env-vars": "/usr/bin/env",
-    "ldd-nest": "ldd nest",
-    "conda-environment": "conda env export",
-    "hostname": "hostname -f",
-    "ompi_info": "ompi_info",
-    "ompi_info-parsable": "ompi_info --parsable --all",
-    "lsmod": "lsmod",
-    "ip-r": "ip r",
-    "ip-l": "ip l",
-    "nproc": "nproc",
-    "numactl-show": "numactl --show",
-    "numastat": "numastat",
-    "lscpu-json": "lscpu --json --output-all",
-    "lscpu-extended-json": "lscpu --json --output-all --bytes --extended",
-    "lscpu-caches-json": "lscpu --json --output-all --bytes --caches",
-    "hwloc-info": "hwloc-info",
-    "hwloc-ls": "hwloc-ls",
+log = logging.getLogger(__name__)
+
+
+def _configure_logging(verbose: bool = False):
+    "Configure logging from logging.yaml, or fall back to a basic config."
+    try:
+        import yaml  # pylint: disable=import-outside-toplevel
+
+        basepath = Path(__file__).parent
+        with (basepath / "../logging.yaml").open("r", encoding="utf8") as logconfig:
+            config = yaml.safe_load(logconfig)
+        # keep the module logger, which exists already, enabled
+        config.setdefault("disable_existing_loggers", False)
+        logging.config.dictConfig(config)
+    except ImportError as exc:
+        logging.basicConfig(level=logging.INFO)
+        log.warning("using basic logging config due to exception %s", exc)
+    except FileNotFoundError as exc:
+        logging.basicConfig(level=logging.INFO)
+        log.warning("using basic logging config due to exception %s", exc)
+    if verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+
+_recordables: Dict[str, List[str]] = {
+    "date": ["date", "--iso=seconds"],
+    "sysctl-a": ["sysctl", "-a"],
+    "lshw": ["lshw", "-json", "-quiet"],
+    "dmidecode": ["dmidecode"],
+    "lspci": ["lspci", "-v"],
+    "false": ["/bin/false"],
+    "broken": ["nothing"],
+    "env-vars": ["/usr/bin/env"],
+    "ldd-nest": ["ldd", "nest"],
+    "conda-environment": ["conda", "env", "export"],
+    "ompi_info": ["ompi_info"],
+    "ompi_info-parsable": ["ompi_info", "--parsable", "--all"],
+    "lsmod": ["lsmod"],
+    "ip-r": ["ip", "r"],
+    "ip-l": ["ip", "l"],
+    "numactl-show": ["numactl", "--show"],
+    "numastat": ["numastat"],
+    "lscpu-json": ["lscpu", "--json", "--output-all"],
+    "lscpu-extended-json": ["lscpu", "--json", "--output-all", "--bytes", "--extended"],
+    "lscpu-caches-json": ["lscpu", "--json", "--output-all", "--bytes", "--caches"],
+    "hwloc-info": ["hwloc-info"],
+    "hwloc-ls": ["hwloc-ls"],
     # hwloc-topology is extremely slow on machines with high number of cores.
     # We should consider putting this into a group of --slow commands.
-    # "hwloc-topology": "hwloc-gather-topology {outdir}/hwloc-topology",
-    "pip-list": "pip list --format json",
-    "lstopo": "lstopo --of ascii {outdir}/{name}",
-    "getconf": "getconf -a",
-    "ulimit": "ulimit -a",
-    "ucx_info-v": "ucx_info -v",
-    "ucx_info-c": "ucx_info -c",
-    "modules": "module list",
-    "proc-sys-kernel": "bash -c 'cp -r /proc/sys/kernel {outdir}/{name}; chmod -R u+w {outdir}/{name}'",
-    "ps-aux": "ps aux",
-    "scontrol": "scontrol show jobid ${SLURM_JOBID} -d",
-    "mpivars": "mpivars",
-    "pldd-nest": "python -c \"import nest, subprocess as s, os; s.check_call(['/usr/bin/pldd', str(os.getpid())])\"",
+    # "hwloc-topology": ["hwloc-gather-topology", "{outdir}/hwloc-topology"],
+    "pip-list": ["pip", "list", "--format", "json"],
+    "lstopo": ["lstopo", "--of", "ascii", "{outdir}/{name}"],
+    "getconf": ["getconf", "-a"],
+    "ucx_info-v": ["ucx_info", "-v"],
+    "ucx_info-c": ["ucx_info", "-c"],
+    # `module` is a shell function defined by the login profile
+    "modules": ["bash", "-lc", "module list"],
+    "ps-aux": ["ps", "aux"],
+    "scontrol": ["scontrol", "show", "jobid", "{SLURM_JOBID}", "-d"],
+    # mpivars.sh only sets environment variables, it has to be sourced
+    "mpivars": ["bash", "-lc", ". mpivars.sh && env"],
+    "pldd-nest": [
+        "python",
+        "-c",
+        "import nest, subprocess as s, os; s.check_call(['/usr/bin/pldd', str(os.getpid())])",
+    ],
+}
+
+
+# Recordables that dominate the total runtime. These are started first.
+_slow_recordables = {"sysctl-a", "lshw", "dmidecode", "hwloc-ls", "lstopo", "conda-environment"}
+
+# Recordables whose output does not change until the next reboot. These can be
+# taken from the --cache-dir. hwloc is not included, as it only reports the
+# CPUs and memory of the calling process' cgroup, which differs between jobs.
+# Neither are lscpu's CPU listings, which contain current frequencies and
+# online states.
+_static_recordables = {
+    "lshw",
+    "dmidecode",
+    "lspci",
+    "lscpu-caches-json",
+}
+
+
+def _read_small(path: str, size: int = 65536) -> bytes:
+    """
+    Read up to `size` bytes of a (proc) file with a single bounded read.
+
+    A read that would block is retried once before giving up.
+    """
+    fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    try:
+        try:
+            return os.read(fd, size)
+        except BlockingIOError:
+            return os.read(fd, size)
+    finally:
+        os.close(fd)
+
+
+def _read_file(path: str, chunksize: int = 65536) -> bytes:
+    "Read a complete (proc) file with unbuffered reads."
+    chunks = []
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        chunk = os.read(fd, chunksize)
+        while chunk:
+            chunks.append(chunk)
+            chunk = os.read(fd, chunksize)
+    finally:
+        os.close(fd)
+    return b"".join(chunks)
+
+
+def _read_cpuinfo() -> bytes:
+    "Read /proc/cpuinfo."
+    return _read_file("/proc/cpuinfo")
+
+
+def _read_meminfo() -> bytes:
+    "Read /proc/meminfo."
+    return _read_file("/proc/meminfo")
+
+
+def _read_hostname() -> bytes:
+    "Return the fully qualified host name, like `hostname -f`."
+    hostname = socket.gethostname()
+    try:
+        hostname = socket.getaddrinfo(hostname, None, flags=socket.AI_CANONNAME)[0][3] or hostname
+    except OSError as e:  # name resolution failed, keep the plain host name
+        log.debug("could not resolve %s: %s", hostname, e)
+    return f"{hostname}\n".encode("utf8")
+
+
+def _read_nproc() -> bytes:
+    "Return the number of CPUs usable by this process, like `nproc`."
+    return f"{len(os.sched_getaffinity(0))}\n".encode("utf8")
+
+
+def _dump_rlimits() -> bytes:
+    "Return soft and hard resource limits of this process, like `ulimit -a`."
+    lines = []
+    for name in sorted(key for key in dir(resource) if key.startswith("RLIMIT_")):
+        limits = resource.getrlimit(getattr(resource, name))
+        lines.append(" ".join([name] + ["unlimited" if lim == resource.RLIM_INFINITY else str(lim) for lim in limits]))
+    return "".join(line + "\n" for line in lines).encode("utf8")
+
+
+def _read_tree(path: str) -> Dict[str, str]:
+    "Read all readable files below `path` into a dictionary keyed by path."
+    contents = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                contents.update(_read_tree(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                try:
+                    contents[entry.path] = _read_small(entry.path).decode("utf8", errors="replace")
+                except OSError as e:  # write-only or otherwise inaccessible entries
+                    log.debug("skipping %s: %s", entry.path, e)
+    return contents
+
+
+def _dump_proc_sys_kernel() -> bytes:
+    "Dump /proc/sys/kernel as JSON without forking any process."
+    return orjson.dumps(_read_tree("/proc/sys/kernel"), option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+
+
+# Recordables implemented in Python. The returned data is saved like the
+# output of a command.
+_inline_recordables: Dict[str, Callable[[], bytes]] = {
+    "cpuinfo": _read_cpuinfo,
+    "meminfo": _read_meminfo,
+    "hostname": _read_hostname,
+    "nproc": _read_nproc,
+    "ulimit": _dump_rlimits,
+    "proc-sys-kernel": _dump_proc_sys_kernel,
 }
 
 
@@ -116,96 +248,232 @@ class Result:  # pylint: disable=too-many-instance-attributes
 
     name: str
     command: str
-    starttime: float = field(default_factory=time.time)
-    exectime: Optional[float] = None
-    iotime: Optional[float] = None
+    starttime: float = field(default_factory=time.time)  # seconds since the epoch
+    exectime: Optional[float] = None  # seconds
+    iotime: Optional[float] = None  # seconds
     success: bool = False
     return_code: Optional[int] = None
     shell: Optional[Sequence[str]] = None
     stdout_file: Optional[str] = None
     stderr_file: Optional[str] = None
     error_message: Optional[str] = None
+    cached: bool = False
+
+
+@functools.lru_cache(maxsize=None)
+def _which(executable: str) -> Optional[str]:
+    "Return the full path of an executable or None if it is not installed."
+    return shutil.which(executable)
+
+
+def _boot_id() -> str:
+    "Return the random identifier the kernel generates at every boot."
+    with open("/proc/sys/kernel/random/boot_id", "r", encoding="utf8") as bootid:
+        return bootid.read().strip()
 
 
-class Recorder:
+def _copy_file(source: Union[str, Path], target: Union[str, Path]) -> str:
+    """
+    Copy a file, unless source and target are the same file already.
+
+    The data is copied into a temporary file next to the target, which then
+    replaces the target. Concurrent readers never see a partially written file.
+    """
+    if not (os.path.exists(target) and os.path.samefile(source, target)):
+        fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(target), prefix=f".{os.path.basename(target)}.")
+        os.close(fd)
+        try:
+            shutil.copyfile(source, tmpname)
+            shutil.copymode(source, tmpname)  # mkstemp creates files private to the user
+            os.replace(tmpname, target)
+        except BaseException:
+            os.unlink(tmpname)
+            raise
+    return str(target)
+
+
+def _use_pidfd_child_watcher():
+    """
+    Reap child processes through pidfds registered in the event loop.
+
+    The default child watcher of Python < 3.12 starts a thread per child which
+    blocks in `waitpid`. With pidfds the exits are multiplexed by the loop's
+    selector (epoll) instead. Python >= 3.12 does this on its own.
+    """
+    if sys.version_info < (3, 9) or sys.version_info >= (3, 12):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:  # pidfds need Linux >= 5.3
+        return
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(asyncio.get_running_loop())
+    asyncio.set_child_watcher(watcher)
+
+
+def _describe(recordable: Union[Sequence[str], Callable[[], bytes]]) -> str:
+    "Return a printable form of a command or inline recordable."
+    return recordable.__name__ if callable(recordable) else shlex.join(recordable)
+
+
+class Recorder:  # pylint: disable=too-many-instance-attributes
     "Record metadata and handle all error cases."
 
-    def __init__(self, outdir: str = "about", timeout: float = 3, errors_fatal: bool = False, logtimethres: float = 3):
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        outdir: str = "about",
+        timeout: float = 3,
+        errors_fatal: bool = False,
+        logtimethres: float = 3,
+        *,
+        concurrency: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+    ):
         self.errors_fatal = errors_fatal
         self.timeout = timeout
+        if concurrency is not None and concurrency < 1:
+            raise ValueError(f"concurrency must be a positive integer, got {concurrency}")
+        self.concurrency = concurrency if concurrency is not None else min(os.cpu_count() or 1, 8)
         self.logtimethres = logtimethres  # seconds
         self.outdir = Path(outdir or ".")
         if not self.outdir.is_dir():
             self.outdir.mkdir()
             log.warning("created output directory %s", outdir)
+        self._outdir_str = str(self.outdir)  # avoids Path operations per command
+        self._env = os.environ.copy()  # environment is invariant during recording
+        # cache directories may be shared between nodes, key by node and boot;
+        # root-only tools like lshw report less for other users, so key by uid
+        cache_key = f"{socket.gethostname()}-{_boot_id()}-{os.geteuid()}"
+        self.cache_dir = Path(cache_dir) / cache_key if cache_dir else None
+
+    def __make_command(self, name: str, command: Sequence[str]) -> List[str]:
+        """
+        Build a Popen compatible list to run the command.
 
-    def __make_command(self, name, command):
-        "Build a Popen compatible list to run the command."
-        parameters = os.environ.copy()
-        parameters.update(
-            {
-                "outdir": self.outdir,
-                "name": name,
-                "command": command,
-            }
-        )
-        return shlex.split(command.format(**parameters))
+        Only arguments containing a `{placeholder}` are formatted, using the
+        parameters `outdir`, `name` and the environment variables.
+        """
+        parameters = ChainMap({"outdir": self._outdir_str, "name": name}, self._env)
+        return [arg.format_map(parameters) if "{" in arg else arg for arg in command]
 
-    def _save_nonzero(self, name, data) -> Optional[str]:
+    def _save_nonzero(self, name: str, data: bytes) -> Optional[str]:
         """
         Save data to file if non-zero.
 
         Returns
         -------
-        bool:   data has been written.
+        str:    name of the file if data has been written, otherwise None.
         """
         filename = None
         if data:
-            filename = str(self.outdir / name)
-            with open(filename, "wb") as outfile:
-                outfile.write(data)
+            filename = f"{self._outdir_str}/{name}"
+            # unbuffered write, a buffered file object would only add syscalls
+            fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                view = memoryview(data)
+                while view:
+                    written = os.write(fd, view)
+                    view = view[written:]
+            finally:
+                os.close(fd)
         return filename
 
-    def record(self, name: str, command: str) -> Dict[str, Any]:
+    @staticmethod
+    def _drop_empty(filename: str) -> Optional[str]:
+        """
+        Remove file if it is empty.
+
+        Returns
+        -------
+        str:    name of the file if it has been kept, otherwise None.
+        """
+        if os.stat(filename).st_size:
+            return filename
+        os.unlink(filename)
+        return None
+
+    @staticmethod
+    async def _spawn(shell: Sequence[str], stdout_path: str, stderr_path: str) -> Process:
+        """
+        Start a command with its output redirected into files.
+
+        The child writes directly into the files, so no output is buffered in
+        Python. Empty files are removed again if the command cannot be started
+        or starting it is cancelled.
+
+        The executable is resolved to an absolute path, which lets
+        `subprocess` use `posix_spawn` instead of `fork`+`exec` and avoids
+        copying the page tables of a large parent process. `close_fds` stays
+        enabled, as C libraries loaded into the process (NEST, MPI) may hold
+        inheritable descriptors. With that, `posix_spawn` is only used from
+        Python 3.13 on and where the C library supports closing descriptors;
+        older versions fall back to `fork`+`exec`.
+        """
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        outfd = os.open(stdout_path, flags, 0o644)
+        errfd = -1
+        try:
+            errfd = os.open(stderr_path, flags, 0o644)
+            return await asyncio.create_subprocess_exec(
+                *shell,
+                executable=_which(shell[0]) or shell[0],
+                stdout=outfd,
+                stderr=errfd,
+                stdin=DEVNULL,
+            )
+        except (OSError, asyncio.CancelledError):
+            Recorder._drop_empty(stdout_path)
+            if errfd >= 0:
+                Recorder._drop_empty(stderr_path)
+            raise
+        finally:  # the child has its own copies of the descriptors
+            os.close(outfd)
+            if errfd >= 0:
+                os.close(errfd)
+
+    async def record(self, name: str, command: Sequence[str]) -> Result:
         """
         Record output of a single command.
 
         Returns
         -------
-        dict: dictionary with result metadata
+        Result: result metadata
         """
         log.info("recording %s...", name)
 
-        stdout_data = None
-        stderr_data = None
-
-        res = Result(name, command)
+        res = Result(name, shlex.join(command))
         try:
             res.shell = self.__make_command(name, command)
-            assert res.shell  # required assert, otherwise shell may be None, which is not allowed in Popen
-            with Popen(res.shell, stdout=PIPE, stderr=PIPE, stdin=DEVNULL) as infile:
-                try:
-                    (stdout_data, stderr_data) = infile.communicate(timeout=self.timeout)
-                except TimeoutExpired:
-                    log.warning("%s: process did not finish in time! Output will be incomplete!", name)
-                    infile.kill()
-                    outs, errs = infile.communicate()
-                    log.error("Final words on stdout:\n%s", outs)
-                    log.error("Final words on stderr:\n%s", errs)
-                    stdout_data = outs
-                    stderr_data = errs
-                stoptime = time.time()
-                res.exectime = stoptime - res.starttime
-                if infile.returncode != 0:
-                    log.warning("%s: returned %s (non-zero)!", name, infile.returncode)
-                res.stdout_file = self._save_nonzero(name + ".out", stdout_data)
-                res.stderr_file = self._save_nonzero(name + ".err", stderr_data)
-                if stderr_data and self.errors_fatal:
-                    log.fatal("ERRORS are configured to be fatal.")
-                    raise ValueError("Process wrote errors to STDERR!")
-                res.iotime = time.time() - stoptime
-                res.return_code = infile.returncode
-                res.success = True
+            assert res.shell  # required assert, otherwise shell may be empty, which is not allowed in exec
+            stdout_path = f"{self._outdir_str}/{name}.out"
+            stderr_path = f"{self._outdir_str}/{name}.err"
+            res.starttime = time.time()
+            startclock = time.monotonic_ns()
+            proc = await self._spawn(res.shell, stdout_path, stderr_path)
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                log.warning("%s: process did not finish in time! Output will be incomplete!", name)
+                proc.kill()
+                await proc.wait()
+            except asyncio.CancelledError:  # recording is aborted, do not leave the process behind
+                proc.kill()
+                await proc.wait()
+                self._drop_empty(stdout_path)
+                self._drop_empty(stderr_path)
+                raise
+            stopclock = time.monotonic_ns()
+            res.exectime = (stopclock - startclock) / 1e9
+            if proc.returncode != 0:
+                log.warning("%s: returned %s (non-zero)!", name, proc.returncode)
+            res.stdout_file = self._drop_empty(stdout_path)
+            res.stderr_file = self._drop_empty(stderr_path)
+            if res.stderr_file and self.errors_fatal:
+                log.fatal("ERRORS are configured to be fatal.")
+                raise ValueError("Process wrote errors to STDERR!")
+            res.iotime = (time.monotonic_ns() - stopclock) / 1e9
+            res.return_code = proc.returncode
+            res.success = True
         except KeyError as e:
             log.error("%s: called process failed! Undefined variable %s", name, e)
             res.error_message = f"KeyError: Undefined variable {e}"
@@ -217,57 +485,199 @@ class Recorder:
             log.error("%s: %s", name, e)
             res.error_message = f"FileNotFoundError: {e}"
         finally:
-            if res.exectime is not None and res.exectime > self.logtimethres:
-                log.info("%s execution took %.2f seconds", name, res.exectime)
-            if res.exectime is not None and res.iotime is not None and res.exectime + res.iotime > self.logtimethres:
-                log.info("%s execution+io took %.2f seconds", name, res.iotime)
-        return asdict(res)
-
-    def record_all(self, recordables: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
-        "Iterate through all recordables and gather data safely."
-        results = {}
-        for recordable in recordables.items():
-            results[recordable[0]] = self.record(*recordable)
+            self._log_times(res)
+        return res
+
+    async def record_inline(self, name: str, function: Callable[[], bytes]) -> Result:
+        """
+        Record output of a Python function without spawning a process.
+
+        The function is run in a worker thread to not block the event loop.
+
+        Returns
+        -------
+        Result: result metadata
+        """
+        log.info("recording %s...", name)
+
+        res = Result(name, function.__name__)
+        try:
+            res.starttime = time.time()
+            startclock = time.monotonic_ns()
+            data = await asyncio.get_running_loop().run_in_executor(None, function)
+            stopclock = time.monotonic_ns()
+            res.exectime = (stopclock - startclock) / 1e9
+            res.stdout_file = self._save_nonzero(name + ".out", data)
+            res.iotime = (time.monotonic_ns() - stopclock) / 1e9
+            res.success = True
+        except OSError as e:
+            log.error("%s: %s", name, e)
+            res.error_message = f"{type(e).__name__}: {e}"
+        finally:
+            self._log_times(res)
+        return res
+
+    def _log_times(self, res: Result):
+        "Log execution times above the configured threshold."
+        if res.exectime is not None and res.exectime > self.logtimethres:
+            log.info("%s execution took %.2f seconds", res.name, res.exectime)
+        if res.exectime is not None and res.iotime is not None and res.exectime + res.iotime > self.logtimethres:
+            log.info("%s execution+io took %.2f seconds", res.name, res.exectime + res.iotime)
+
+    @staticmethod
+    def _not_installed(name: str, command: Sequence[str]) -> Result:
+        "Create the result of a command whose executable is not installed."
+        log.warning("%s: %s not found, skipping", name, command[0])
+        return Result(name, shlex.join(command), shell=list(command), error_message="binary not found")
+
+    def _restore_cached(self, name: str, recordable: Union[Sequence[str], Callable[[], bytes]]) -> Optional[Result]:
+        """
+        Copy output of a previous run from the cache directory.
+
+        The cache directory is specific to this node, boot and user, so any
+        output found there is still valid.
+
+        Returns
+        -------
+        Result: result metadata, or None if there is no valid cached output.
+        """
+        assert self.cache_dir is not None
+        cached = {suffix: self.cache_dir / (name + suffix) for suffix in (".out", ".err")}
+        if not cached[".out"].is_file():
+            return None
+        log.info("%s: using cached output from %s", name, self.cache_dir)
+        res = Result(name, _describe(recordable), success=True, cached=True)
+        res.stdout_file = _copy_file(cached[".out"], self.outdir / (name + ".out"))
+        if cached[".err"].is_file():
+            res.stderr_file = _copy_file(cached[".err"], self.outdir / (name + ".err"))
+        return res
+
+    def _update_cache(self, res: Result):
+        "Store the output of a successful recordable in the cache directory."
+        assert self.cache_dir is not None
+        if not res.success or res.cached or res.return_code:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for suffix, filename in ((".out", res.stdout_file), (".err", res.stderr_file)):
+            target = self.cache_dir / (res.name + suffix)
+            if filename:
+                _copy_file(filename, target)
+            elif target.exists():  # remove stale output of earlier runs
+                target.unlink()
+
+    async def _record_bounded(
+        self, semaphore: asyncio.Semaphore, name: str, recordable: Union[Sequence[str], Callable[[], bytes]]
+    ) -> Result:
+        "Record a single command or function as soon as the semaphore permits."
+        async with semaphore:
+            if callable(recordable):
+                return await self.record_inline(name, recordable)
+            return await self.record(name, recordable)
+
+    @staticmethod
+    async def _wait_all(tasks: Sequence[asyncio.Task]):
+        "Wait for all tasks, but cancel the others as soon as one fails."
+        if not tasks:
+            return
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            exception = task.exception()
+            if exception is not None:
+                raise exception
+
+    async def record_all(
+        self,
+        recordables: Dict[str, Sequence[str]],
+        inline_recordables: Optional[Dict[str, Callable[[], bytes]]] = None,
+        slow: Collection[str] = (),
+        cacheable: Collection[str] = (),
+    ) -> Dict[str, Result]:
+        """
+        Run all recordables concurrently and gather data safely.
+
+        At most `concurrency` commands are running at the same time to avoid
+        fork storms on shared login nodes. Recordables named in `slow` are
+        started first, so the fast ones run while the slow ones are busy.
+        Recordables named in `cacheable` are taken from and stored in the
+        `cache_dir`, if one is configured.
+        The first exception of a recordable (e.g. a fatal error) cancels all
+        others and is re-raised.
+        """
+        everything: Dict[str, Union[Sequence[str], Callable[[], bytes]]] = {**recordables, **(inline_recordables or {})}
+        finished: Dict[str, Result] = {
+            name: self._not_installed(name, command)
+            for name, command in recordables.items()
+            if _which(command[0]) is None
+        }
+        cacheable = [name for name in cacheable if name in everything and name not in finished]
+        if self.cache_dir is not None:
+            for name in cacheable:
+                cached = self._restore_cached(name, everything[name])
+                if cached is not None:
+                    finished[name] = cached
+        # tasks acquire the semaphore in the order they are created
+        order = sorted((name for name in everything if name not in finished), key=lambda name: name not in slow)
+        # created here, as semaphores bind to the running loop in Python < 3.10
+        semaphore = asyncio.Semaphore(self.concurrency)
+        _use_pidfd_child_watcher()
+        tasks = [asyncio.create_task(self._record_bounded(semaphore, name, everything[name])) for name in order]
+        await self._wait_all(tasks)
+        finished.update(zip(order, (task.result() for task in tasks)))
+        results = {name: finished[name] for name in everything}  # keep the original order
+        if self.cache_dir is not None:
+            for name in cacheable:
+                self._update_cache(results[name])
         return results
 
 
 def main():
     "Start main CLI entry point."
     args = docopt(__doc__)
-    if args["--verbose"]:
-        log.setLevel(logging.DEBUG)
+    _configure_logging(args["--verbose"])
     log.debug(pformat(args))
 
     log.info("Gathering metadata...")
     starttime = time.time()
     starttimestamp = time.ctime()
+    startclock = time.monotonic_ns()
+
+    try:
+        recorder = Recorder(
+            outdir=args["<outdir>"],
+            logtimethres=float(args["--log-time-threshold"]),
+            timeout=float(args["--command-timeout"]),
+            errors_fatal=args["--errors-fatal"],
+            concurrency=int(args["--concurrency"]) if args["--concurrency"] is not None else None,
+            cache_dir=args["--cache-dir"],
+        )
+    except ValueError as e:
+        raise DocoptExit(f"invalid option value: {e}") from e
 
-    recorder = Recorder(
-        outdir=args["<outdir>"],
-        logtimethres=float(args["--log-time-threshold"]),
-        timeout=float(args["--command-timeout"]),
-        errors_fatal=args["--errors-fatal"],
+    results = asyncio.run(
+        recorder.record_all(_recordables, _inline_recordables, slow=_slow_recordables, cacheable=_static_recordables)
     )
 
-    results = recorder.record_all(_recordables)
-
     if not args["--no-result-json"]:
         resultfile = Path(args["<outdir>"]) / "gather.json"
         log.info("writing result metadata to %s...", resultfile)
-        with resultfile.open("w", encoding="utf8") as outfile:
-            json.dump(
-                {
-                    "version": __version__,
-                    "args": args,
-                    "run": {
-                        "start": starttime,
-                        "at": starttimestamp,
-                        "total_time": time.time() - starttime,
+        with resultfile.open("wb") as outfile:
+            outfile.write(
+                orjson.dumps(
+                    {
+                        "version": __version__,
+                        "args": args,
+                        "run": {
+                            "start": starttime,
+                            "at": starttimestamp,
+                            "total_time": (time.monotonic_ns() - startclock) / 1e9,
+                        },
+                        "results": results,
                     },
-                    "results": results,
-                },
-                outfile,
-                indent=2,
+                    option=orjson.OPT_INDENT_2,
+                )
             )
 
 